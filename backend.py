@@ -1,10 +1,82 @@
 import os
+from functools import lru_cache
 from pathlib import Path
 
 import rich
 from PIL import Image
-from PySide6.QtCore import Property, QObject, QUrl, Signal, Slot
-from PySide6.QtGui import QGuiApplication
+from PySide6.QtCore import Property, QObject, QRunnable, QThreadPool, QUrl, Signal, Slot
+from PySide6.QtGui import QGuiApplication, QImageReader
+
+
+@lru_cache(maxsize=None)
+def image_meta(path: Path) -> tuple[tuple[int, int], str | None]:
+    """Read an image's size and format from its header without decoding pixel data.
+
+    Results are cached so each header is parsed at most once across pair generation and interactive selection.
+
+    Parameters
+    ----------
+    path : Path
+        Path to image.
+
+    Returns
+    -------
+    tuple[tuple[int, int], str | None]
+        Image size as (width, height) and image format.
+    """
+    with Image.open(path, 'r') as im:
+        return im.size, im.format
+
+
+def _colorize(text: str, cmp: int | None, focused: bool) -> str:
+    """Wrap text in a font color tag based on comparison result and focus.
+
+    Better/worse use green/red while differing-but-incomparable uses blue; the focused side gets the darker shade.
+
+    Parameters
+    ----------
+    text : str
+        Text to colorize.
+    cmp : int | None
+        Comparison result. Positive if better, negative if worse, 0 if different and None if equal.
+    focused : bool
+        Whether this side is currently focused.
+
+    Returns
+    -------
+    str
+        Colorized text.
+    """
+    if cmp is None:
+        return text
+    if cmp > 0:
+        color = 'forestGreen' if focused else 'limeGreen'
+    elif cmp < 0:
+        color = 'crimson' if focused else 'orangeRed'
+    else:
+        color = 'royalBlue' if focused else 'dodgerBlue'
+
+    return f'<font color="{color}">{text}</font>'
+
+
+class _PrefetchRunnable(QRunnable):
+    """Runnable which reads a pair of images off the UI thread to warm the OS page cache and Qt's image cache."""
+
+    def __init__(self, pair: tuple[Path, Path]) -> None:
+        """Constructor.
+
+        Parameters
+        ----------
+        pair : tuple[Path, Path]
+            Pair of images to prefetch.
+        """
+        super().__init__()
+        self._pair = pair
+
+    def run(self) -> None:
+        """Read both images, discarding the result."""
+        for path in self._pair:
+            QImageReader(str(path)).read()
 
 
 class BackEnd(QObject):
@@ -23,10 +95,20 @@ class BackEnd(QObject):
         self._scoorangeRed_pairs = scoorangeRed_pairs
         self._discarded: set[Path] = set()
 
+        # Common prefix lengths used for display trimming, cached per pair of parent directories.
+        self._prefix_cache: dict[tuple[Path, Path], int] = {}
+
+        # Thread pool used to prefetch upcoming images in the background.
+        self._pool = QThreadPool.globalInstance()
+
         # Load first pair.
         self._idx = 0
         self._load_pair(0)
 
+    # Single notify signal shared by all properties. Emitted once per pair load or focus change so QML performs one
+    # binding evaluation pass instead of one per property.
+    _pair_changed = Signal()
+
     def _get_image(self) -> QUrl:
         """Getter for image property.
 
@@ -36,7 +118,6 @@ class BackEnd(QObject):
             Image path.
         """
         return self._image
-    _image_changed = Signal()
 
     def _get_path1(self) -> str:
         """Getter for path1 property.
@@ -47,7 +128,6 @@ class BackEnd(QObject):
             Path of left image.
         """
         return self._path1
-    _path1_changed = Signal()
 
     def _get_path2(self) -> str:
         """Getter for path2 property.
@@ -58,7 +138,6 @@ class BackEnd(QObject):
             Path of right image.
         """
         return self._path2
-    _path2_changed = Signal()
 
     def _get_stats1(self) -> str:
         """Getter for stats1 property.
@@ -69,7 +148,6 @@ class BackEnd(QObject):
             Stats of left image.
         """
         return self._stats1
-    _stats1_changed = Signal()
 
     def _get_stats2(self) -> str:
         """Getter for stats2 property.
@@ -80,7 +158,6 @@ class BackEnd(QObject):
             Stats of right image.
         """
         return self._stats2
-    _stats2_changed = Signal()
 
     def _get_score(self) -> str:
         """Getter for score property.
@@ -91,7 +168,6 @@ class BackEnd(QObject):
             SSIM score between images.
         """
         return self._score
-    _score_changed = Signal()
 
     def _is_left(self) -> bool:
         """Getter for left property.
@@ -102,7 +178,6 @@ class BackEnd(QObject):
             Whether left image is selected.
         """
         return self._left
-    _left_changed = Signal()
 
     def _get_progress(self) -> float:
         """Getter for progress property.
@@ -113,53 +188,34 @@ class BackEnd(QObject):
             Progress as a fraction.
         """
         return self._progress
-    _progress_changed = Signal()
 
     @Slot()
     def load_left_image(self) -> None:
         """Load left image."""
-        self._image = self._left_image
-        self._stats1 = self._stats1.replace('limeGreen', 'forestGreen').replace('orangeRed', 'crimson')
-        self._stats2 = self._stats2.replace('forestGreen', 'limeGreen').replace('crimson', 'orangeRed')
-        self._left = True
-        self._image_changed.emit()
-        self._stats1_changed.emit()
-        self._stats2_changed.emit()
-        self._left_changed.emit()
+        self._set_focus(True)
 
     @Slot()
     def load_right_image(self) -> None:
         """Load right image."""
-        self._image = self._right_image
-        self._stats1 = self._stats1.replace('forestGreen', 'limeGreen').replace('crimson', 'orangeRed')
-        self._stats2 = self._stats2.replace('limeGreen', 'forestGreen').replace('orangeRed', 'crimson')
-        self._left = False
-        self._image_changed.emit()
-        self._stats1_changed.emit()
-        self._stats2_changed.emit()
-        self._left_changed.emit()
+        self._set_focus(False)
 
     @Slot()
     def toggle_image(self) -> None:
         """Toggle between left and right images."""
-        if self._left:
-            self._image = self._right_image
-            self._stats1 = self._stats1.replace('forestGreen', 'limeGreen').replace(
-                'crimson', 'orangeRed').replace('royalBlue', 'dodgerBlue')
-            self._stats2 = self._stats2.replace('limeGreen', 'forestGreen').replace(
-                'orangeRed', 'crimson').replace('dodgerBlue', 'royalBlue')
-            self._left = False
-        else:
-            self._image = self._left_image
-            self._stats1 = self._stats1.replace('limeGreen', 'forestGreen').replace(
-                'orangeRed', 'crimson').replace('dodgerBlue', 'royalBlue')
-            self._stats2 = self._stats2.replace('forestGreen', 'limeGreen').replace(
-                'crimson', 'orangeRed').replace('royalBlue', 'dodgerBlue')
-            self._left = True
-        self._image_changed.emit()
-        self._stats1_changed.emit()
-        self._stats2_changed.emit()
-        self._left_changed.emit()
+        self._set_focus(not self._left)
+
+    def _set_focus(self, left: bool) -> None:
+        """Focus the given image and notify QML with a single signal emission.
+
+        Parameters
+        ----------
+        left : bool
+            Whether to focus the left image.
+        """
+        self._image = self._left_image if left else self._right_image
+        self._left = left
+        self._stats1, self._stats2 = self._format_stats()
+        self._pair_changed.emit()
 
     @Slot()
     def select(self) -> None:
@@ -204,85 +260,96 @@ class BackEnd(QObject):
         idx : int
             Index of pair to load.
         """
+        # Skip pairs with already discarded images. Done iteratively to keep stack depth constant regardless of how
+        # many consecutive pairs are skipped.
+        while idx < len(self._scoorangeRed_pairs):
+            (path1, path2), score = self._scoorangeRed_pairs[idx]
+            if path1 not in self._discarded and path2 not in self._discarded:
+                break
+            idx += 1
+        self._idx = idx
+
         # If index is out of bounds end application.
         if idx >= len(self._scoorangeRed_pairs):
             QGuiApplication.quit()
             return
 
-        (path1, path2), score = self._scoorangeRed_pairs[idx]
-
-        # If either path has already been discarded, skip this and load next pair.
-        if path1 in self._discarded or path2 in self._discarded:
-            self.next()
-            return
-
         # Set images.
         self._left_image = QUrl.fromLocalFile(path1)
         self._right_image = QUrl.fromLocalFile(path2)
         self._image = self._left_image
 
-        # Get common prefix and remove them from file paths for clarity.
-        prefix = Path(*os.path.commonprefix([path1.parts, path2.parts]))
-        self._path1 = str(Path(*path1.parts[len(prefix.parts):]))
-        self._path2 = str(Path(*path2.parts[len(prefix.parts):]))
+        # Remove the common prefix from file paths for clarity. The prefix only depends on the two parent
+        # directories, so its length is computed once per directory pair and cached.
+        key = (path1.parent, path2.parent)
+        if key not in self._prefix_cache:
+            self._prefix_cache[key] = len(os.path.commonprefix([path1.parts, path2.parts]))
+        prefix_len = self._prefix_cache[key]
+        self._path1 = str(Path(*path1.parts[prefix_len:]))
+        self._path2 = str(Path(*path2.parts[prefix_len:]))
         self._score = f'{score*100:.2f}'
 
-        # Construct stats field.
-        with Image.open(path1, 'r') as im:
-            w1, h1 = im.size
-            f1 = im.format
-        with Image.open(path2, 'r') as im:
-            w2, h2 = im.size
-            f2 = im.format
+        # Compare geometry and format once; stats strings are rebuilt from this state whenever focus changes.
+        (w1, h1), f1 = image_meta(path1)
+        (w2, h2), f2 = image_meta(path2)
 
         # If one image is wholly larger than the other, consider it better.
         if w1 > w2 and h1 > h2:
-            self._stats1 = f'<font color="forestGreen">{w1}×{h1}</font>'
-            self._stats2 = f'<font color="orangeRed">{w2}×{h2}</font>'
+            size_cmp = 1
         elif w2 > w1 and h2 > h1:
-            self._stats1 = f'<font color="crimson">{w1}×{h1}</font>'
-            self._stats2 = f'<font color="limeGreen">{w2}×{h2}</font>'
+            size_cmp = -1
         elif w1 != w2 or h1 != h2:
-            self._stats1 = f'<font color="royalBlue">{w1}×{h1}</font>'
-            self._stats2 = f'<font color="dodgerBlue">{w2}×{h2}</font>'
+            size_cmp = 0
         else:
-            self._stats1 = f'{w1}×{h1}'
-            self._stats2 = f'{w2}×{h2}'
+            size_cmp = None
 
         # Consider PNG to be better than JPEG.
         if f1 == 'PNG' and f2 == 'JPEG':
-            self._stats1 += f' <font color="forestGreen">{f1}</font>'
-            self._stats2 += f' <font color="orangeRed">{f2}</font>'
+            fmt_cmp = 1
         elif f1 == 'JPEG' and f2 == 'PNG':
-            self._stats1 += f' <font color="crimson">{f1}</font>'
-            self._stats2 += f' <font color="limeGreen">{f2}</font>'
+            fmt_cmp = -1
         elif f1 != f2:
-            self._stats1 += f' <font color="royalBlue">{f1}</font>'
-            self._stats2 += f' <font color="dodgerBlue">{f2}</font>'
+            fmt_cmp = 0
         else:
-            self._stats1 += f' {f1}'
-            self._stats2 += f' {f2}'
+            fmt_cmp = None
+
+        self._stats_state = (w1, h1, f1, w2, h2, f2, size_cmp, fmt_cmp)
 
-        # Set left and progress.
+        # Set left, stats and progress.
         self._left = True
+        self._stats1, self._stats2 = self._format_stats()
         self._progress = (idx+1) / len(self._scoorangeRed_pairs)
 
-        # Emit signals.
-        self._image_changed.emit()
-        self._path1_changed.emit()
-        self._path2_changed.emit()
-        self._stats1_changed.emit()
-        self._stats2_changed.emit()
-        self._score_changed.emit()
-        self._left_changed.emit()
-        self._progress_changed.emit()
+        # Notify QML once for all properties.
+        self._pair_changed.emit()
+
+        # Prefetch the next pair in the background so it is already cached when the user advances.
+        if idx + 1 < len(self._scoorangeRed_pairs):
+            self._pool.start(_PrefetchRunnable(self._scoorangeRed_pairs[idx + 1][0]))
+
+    def _format_stats(self) -> tuple[str, str]:
+        """Build both stats strings from the stored comparison state and current focus.
+
+        Returns
+        -------
+        tuple[str, str]
+            Stats of left and right images.
+        """
+        w1, h1, f1, w2, h2, f2, size_cmp, fmt_cmp = self._stats_state
+
+        stats1 = _colorize(f'{w1}×{h1}', size_cmp, self._left)
+        stats2 = _colorize(f'{w2}×{h2}', None if size_cmp is None else -size_cmp, not self._left)
+        stats1 += ' ' + _colorize(f'{f1}', fmt_cmp, self._left)
+        stats2 += ' ' + _colorize(f'{f2}', None if fmt_cmp is None else -fmt_cmp, not self._left)
+
+        return stats1, stats2
 
     # Declare properties.
-    image = Property(QUrl, _get_image, notify=_image_changed)
-    path1 = Property(str, _get_path1, notify=_path1_changed)
-    path2 = Property(str, _get_path2, notify=_path2_changed)
-    stats1 = Property(str, _get_stats1, notify=_stats1_changed)
-    stats2 = Property(str, _get_stats2, notify=_stats2_changed)
-    score = Property(str, _get_score, notify=_score_changed)
-    left = Property(bool, _is_left, notify=_left_changed)
-    progress = Property(float, _get_progress, notify=_progress_changed)
+    image = Property(QUrl, _get_image, notify=_pair_changed)
+    path1 = Property(str, _get_path1, notify=_pair_changed)
+    path2 = Property(str, _get_path2, notify=_pair_changed)
+    stats1 = Property(str, _get_stats1, notify=_pair_changed)
+    stats2 = Property(str, _get_stats2, notify=_pair_changed)
+    score = Property(str, _get_score, notify=_pair_changed)
+    left = Property(bool, _is_left, notify=_pair_changed)
+    progress = Property(float, _get_progress, notify=_pair_changed)
@@ -1,19 +1,30 @@
 import argparse
-import itertools
+import functools
+import os
+import shelve
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
 import cv2
 import numpy as np
-import skimage.metrics
-from PIL import Image
 from PySide6.QtGui import QGuiApplication
 from PySide6.QtQml import QQmlApplicationEngine
 from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn
 
-from backend import BackEnd
+import ssim_numba
+from backend import BackEnd, image_meta
 
-IMAGE_EXTENSIONS = ['.jpg', '.png', '.gif', '.webp']
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.png', '.gif', '.webp'})
+
+# Dispatch resizes via UMat/OpenCL when a suitable device is available.
+_USE_OPENCL = cv2.ocl.haveOpenCL()
+if _USE_OPENCL:
+    cv2.ocl.setUseOpenCL(True)
+
+# Prefer OpenCV's C++ SSIM when the (contrib) quality module is present, otherwise use the Numba kernel.
+_HAVE_CV2_QUALITY = hasattr(cv2, 'quality')
 
 
 def get_images(dirs: list[Path]) -> list[Path]:
@@ -31,14 +42,19 @@ def get_images(dirs: list[Path]) -> list[Path]:
     """
     images: list[Path] = []
     for dir in dirs:
-        # Only keep files which end with pre-defined extensions.
-        images += sorted([f for f in dir.iterdir() if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS])
+        # Only keep files which end with pre-defined extensions. scandir avoids a stat call per entry.
+        with os.scandir(dir) as entries:
+            images += sorted(
+                Path(entry.path)
+                for entry in entries
+                if entry.is_file(follow_symlinks=False) and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            )
 
     return images
 
 
-def get_pairs(images: list[Path], cross: bool = False, tolerance: float = 0.1) -> list[tuple[Path, Path]]:
-    """Generate pairs of images to compare.
+def get_pair_mask(images: list[Path], cross: bool = False, tolerance: float = 0.1) -> np.ndarray:
+    """Build a boolean mask of image pairs to compare.
 
     If cross is specified images from the same directory are not compared; only images across directories are compared.
     Images are also skipped from comparison if difference between their aspect ratios is greater than provided tolerance
@@ -55,31 +71,99 @@ def get_pairs(images: list[Path], cross: bool = False, tolerance: float = 0.1) -
 
     Returns
     -------
-    pairs : list[tuple[Path, Path]]
-        List of pair of images to compare.
+    mask : np.ndarray
+        Upper triangular boolean matrix where mask[i, j] is True if images i and j should be compared.
     """
-    pairs: list[tuple[Path, Path]] = []
-    ar_cache: dict[Path, float] = {}
-    for path1, path2 in itertools.combinations(images, 2):
-        # If cross is specified do not compare images from the same directory.
-        if cross and path1.parent == path2.parent:
-            continue
+    # Compute aspect ratios and parent directory ids once per image.
+    ars = np.empty(len(images))
+    parents = np.empty(len(images), dtype=np.intp)
+    parent_ids: dict[Path, int] = {}
+    for i, path in enumerate(images):
+        (w, h), _ = image_meta(path)
+        ars[i] = w / h
+        parents[i] = parent_ids.setdefault(path.parent, len(parent_ids))
+
+    # Build a pairwise mask keeping upper triangular combinations whose aspect ratios are within tolerance.
+    mask = np.abs(ars[:, None] - ars[None, :]) <= tolerance
+    mask &= np.triu(np.ones(mask.shape, dtype=bool), k=1)
+
+    # If cross is specified do not compare images from the same directory.
+    if cross:
+        mask &= parents[:, None] != parents[None, :]
 
-        # If not seen earlier compute aspect ratio and store it.
-        if path1 not in ar_cache:
-            with Image.open(path1, 'r') as im:
-                ar_cache[path1] = im.size[0] / im.size[1]
-        if path2 not in ar_cache:
-            with Image.open(path2, 'r') as im:
-                ar_cache[path2] = im.size[0] / im.size[1]
+    return mask
 
-        # Check if difference between aspect ratios is within tolerance level.
-        if abs(ar_cache[path1] - ar_cache[path2]) > tolerance:
-            continue
 
-        pairs.append((path1, path2))
+def iter_pairs(images: list[Path], mask: np.ndarray) -> Iterator[tuple[Path, Path]]:
+    """Lazily generate the pairs of images selected by the pair mask.
 
-    return pairs
+    Yielding pairs instead of materializing the full O(N²) list keeps memory bounded and lets pair generation
+    interleave with scoring.
+
+    Parameters
+    ----------
+    images : list[Path]
+        List of images to compare.
+    mask : np.ndarray
+        Boolean pair mask as returned by get_pair_mask.
+
+    Yields
+    ------
+    pair : tuple[Path, Path]
+        Pair of images to compare.
+    """
+    for i, j in zip(*np.nonzero(mask)):
+        yield (images[i], images[j])
+
+
+@functools.lru_cache(maxsize=512)
+def load_gray(path: Path) -> np.ndarray:
+    """Read an image and decode it to a full resolution grayscale array.
+
+    Results are cached so that an image participating in many pairs is only decoded once (per worker process).
+
+    Parameters
+    ----------
+    path : Path
+        Path to image.
+
+    Returns
+    -------
+    image : np.ndarray
+        Decoded grayscale image.
+    """
+    # Read image via numpy to support unicode paths.
+    buffer = np.fromfile(path, dtype=np.uint8)
+    return cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+
+
+@functools.lru_cache(maxsize=1024)
+def load_thumb(path: Path, w: int, h: int) -> np.ndarray:
+    """Load an image as grayscale resized to the given dimensions.
+
+    Thumbnails are cached keyed on (path, w, h); pairs sharing a target size reduce to pure in-memory lookups, and
+    the ~w×h uint8 working set stays cache resident during scoring.
+
+    Parameters
+    ----------
+    path : Path
+        Path to image.
+    w : int
+        Target width.
+    h : int
+        Target height.
+
+    Returns
+    -------
+    image : np.ndarray
+        Resized grayscale image.
+    """
+    image = load_gray(path)
+
+    # Resize on the OpenCL device if available.
+    if _USE_OPENCL:
+        return cv2.resize(cv2.UMat(image), (w, h)).get()
+    return cv2.resize(image, (w, h))
 
 
 def similarity(path1: Path, path2: Path, resolution: int = 100) -> float:
@@ -99,11 +183,9 @@ def similarity(path1: Path, path2: Path, resolution: int = 100) -> float:
     score : float
         Computed SSIM score.
     """
-    # Read images (via numpy to support unicode paths) and convert to grayscale.
-    im1 = np.fromfile(path1, dtype=np.uint8)
-    im2 = np.fromfile(path2, dtype=np.uint8)
-    im1 = cv2.imdecode(im1, cv2.IMREAD_GRAYSCALE)
-    im2 = cv2.imdecode(im2, cv2.IMREAD_GRAYSCALE)
+    # Load images as grayscale (cached across pairs).
+    im1 = load_gray(path1)
+    im2 = load_gray(path2)
 
     # Compuate average aspect ratio.
     h1, w1 = im1.shape
@@ -118,14 +200,52 @@ def similarity(path1: Path, path2: Path, resolution: int = 100) -> float:
         w = resolution
         h = int(resolution / avg_ar)
 
-    # Resize images and compute structural similarity score.
-    im1 = cv2.resize(im1, (w, h))
-    im2 = cv2.resize(im2, (w, h))
-    score = skimage.metrics.structural_similarity(im1, im2)
+    # Fetch resized images (cached across pairs) and compute structural similarity score.
+    im1 = load_thumb(path1, w, h)
+    im2 = load_thumb(path2, w, h)
+    if _HAVE_CV2_QUALITY:
+        score = cv2.quality.QualitySSIM_compute(im1, im2)[0][0]
+    else:
+        score = ssim_numba.ssim_u8(im1, im2)
 
     return score
 
 
+def _signature(path: Path) -> str:
+    """Build a cheap content signature for an image from its size and modification time.
+
+    Parameters
+    ----------
+    path : Path
+        Path to image.
+
+    Returns
+    -------
+    signature : str
+        Signature string.
+    """
+    stat = path.stat()
+    return f'{stat.st_size}:{int(stat.st_mtime)}'
+
+
+def _score_pair(pair: tuple[Path, Path], resolution: int = 100) -> float:
+    """Compute similarity for a pair of images. Module level wrapper around similarity for use with process pools.
+
+    Parameters
+    ----------
+    pair : tuple[Path, Path]
+        Pair of images to compare.
+    resolution : int, optional
+        Resolution at which to compute SSIM. (default=100)
+
+    Returns
+    -------
+    score : float
+        Computed SSIM score.
+    """
+    return similarity(pair[0], pair[1], resolution)
+
+
 def main() -> None:
     """Main function for script."""
     # Parse arguments.
@@ -145,24 +265,50 @@ def main() -> None:
     dirs = [Path(d) for d in args.dirs]
     images = get_images(dirs)
 
-    # Generate pairs of images for comparison.
-    pairs = get_pairs(images, args.cross, args.tolerance)
+    # Determine which pairs of images to compare.
+    mask = get_pair_mask(images, args.cross, args.tolerance)
+    total = int(mask.sum())
 
-    # Compute similarity between pairs.
+    # Compute similarity between pairs in parallel across all cores.
     with Progress(
         TextColumn('[progress.description]{task.description}'),
         BarColumn(),
         MofNCompleteColumn(),
     ) as pbar:
-        task = pbar.add_task('Computing SSIM', total=len(pairs))
-
-        scores: list[float] = []
-        for p1, p2 in pairs:
-            scores.append(similarity(p1, p2, args.resolution))
-            pbar.update(task, advance=1)
-
-    # Sort by scores and start interactive selection.
-    scored_pairs = sorted(zip(pairs, scores), key=lambda x: x[1], reverse=True)
+        task = pbar.add_task('Computing SSIM', total=total)
+
+        # Warm the JIT once up-front so workers load the compiled kernel from cache.
+        if not _HAVE_CV2_QUALITY:
+            ssim_numba.warmup()
+
+        score_one = functools.partial(_score_pair, resolution=args.resolution)
+        pairs: list[tuple[Path, Path]] = []
+        keys: list[str] = []
+        scores: list[float | None] = []
+        todo: list[int] = []
+        with shelve.open(str(dirs[0] / '.imcmp_cache')) as cache:
+            # Look up each pair in the persistent cache, collecting misses for computation.
+            signatures = {path: _signature(path) for path in images}
+            for pair in iter_pairs(images, mask):
+                sig1, sig2 = signatures[pair[0]], signatures[pair[1]]
+                pairs.append(pair)
+                keys.append(f'{min(sig1, sig2)}:{max(sig1, sig2)}:{args.resolution}')
+                scores.append(cache.get(keys[-1]))
+                if scores[-1] is None:
+                    todo.append(len(pairs) - 1)
+                else:
+                    pbar.update(task, advance=1)
+
+            # Compute and persist scores for the remaining pairs.
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                for i, score in zip(todo, executor.map(score_one, [pairs[i] for i in todo], chunksize=16)):
+                    scores[i] = score
+                    cache[keys[i]] = score
+                    pbar.update(task, advance=1)
+
+    # Sort by scores in descending order and start interactive selection.
+    scores_arr = np.asarray(scores, dtype=np.float32)
+    scored_pairs = [(pairs[i], float(scores_arr[i])) for i in np.argsort(-scores_arr)]
 
     app = QGuiApplication(sys.argv)
     engine = QQmlApplicationEngine()
@@ -0,0 +1,105 @@
+"""Numba JIT compiled implementation of structural similarity for grayscale uint8 images.
+
+Window means, variances and covariances are computed via integral image box sums instead of repeated uniform filter
+passes, which avoids the Python/NumPy overhead that dominates SSIM on small images.
+"""
+
+import numpy as np
+from numba import njit
+
+C1 = (0.01 * 255) ** 2
+C2 = (0.03 * 255) ** 2
+WIN_SIZE = 7
+
+
+@njit(cache=True, fastmath=True)
+def integral_image(x: np.ndarray) -> np.ndarray:
+    """Compute the integral image of a 2D array.
+
+    The result is padded with a leading row and column of zeros so that box sums need no bounds checks.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        2D array.
+
+    Returns
+    -------
+    out : np.ndarray
+        Integral image of shape (h+1, w+1) as float64.
+    """
+    h, w = x.shape
+    out = np.zeros((h + 1, w + 1), dtype=np.float64)
+    for i in range(h):
+        row_sum = 0.0
+        for j in range(w):
+            row_sum += x[i, j]
+            out[i + 1, j + 1] = out[i, j + 1] + row_sum
+
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def ssim_u8(im1: np.ndarray, im2: np.ndarray) -> float:
+    """Compute mean structural similarity between two grayscale uint8 images of the same shape.
+
+    Uses a 7×7 sliding window matching the defaults of skimage.metrics.structural_similarity.
+
+    Parameters
+    ----------
+    im1 : np.ndarray
+        First image.
+    im2 : np.ndarray
+        Second image.
+
+    Returns
+    -------
+    score : float
+        Mean SSIM over all valid windows.
+    """
+    h, w = im1.shape
+
+    a = im1.astype(np.float64)
+    b = im2.astype(np.float64)
+
+    # Integral images for all five window sums needed by SSIM.
+    ii_a = integral_image(a)
+    ii_b = integral_image(b)
+    ii_aa = integral_image(a * a)
+    ii_bb = integral_image(b * b)
+    ii_ab = integral_image(a * b)
+
+    n = WIN_SIZE * WIN_SIZE
+    cov_norm = n / (n - 1)
+
+    total = 0.0
+    count = 0
+    for i in range(h - WIN_SIZE + 1):
+        for j in range(w - WIN_SIZE + 1):
+            i2 = i + WIN_SIZE
+            j2 = j + WIN_SIZE
+
+            # Window sums via integral image box sums.
+            s_a = ii_a[i2, j2] - ii_a[i, j2] - ii_a[i2, j] + ii_a[i, j]
+            s_b = ii_b[i2, j2] - ii_b[i, j2] - ii_b[i2, j] + ii_b[i, j]
+            s_aa = ii_aa[i2, j2] - ii_aa[i, j2] - ii_aa[i2, j] + ii_aa[i, j]
+            s_bb = ii_bb[i2, j2] - ii_bb[i, j2] - ii_bb[i2, j] + ii_bb[i, j]
+            s_ab = ii_ab[i2, j2] - ii_ab[i, j2] - ii_ab[i2, j] + ii_ab[i, j]
+
+            mu1 = s_a / n
+            mu2 = s_b / n
+            sigma1_sq = cov_norm * (s_aa / n - mu1 * mu1)
+            sigma2_sq = cov_norm * (s_bb / n - mu2 * mu2)
+            sigma12 = cov_norm * (s_ab / n - mu1 * mu2)
+
+            total += ((2 * mu1 * mu2 + C1) * (2 * sigma12 + C2)) / \
+                ((mu1 * mu1 + mu2 * mu2 + C1) * (sigma1_sq + sigma2_sq + C2))
+            count += 1
+
+    return total / count
+
+
+def warmup() -> None:
+    """Trigger JIT compilation with a dummy call so the first real comparison runs at full speed."""
+    dummy = np.zeros((WIN_SIZE, WIN_SIZE), dtype=np.uint8)
+    ssim_u8(dummy, dummy)